@@ -1,17 +1,55 @@
 import streamlit as st
-import psycopg2
-import pymongo
-import mysql.connector
-import pymssql
 import pandas as pd
 import google.generativeai as genai
+import importlib
 import json
-from bson import ObjectId
+import math
+import re
+import hashlib
 import traceback
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, astuple, dataclass, field, replace
+from functools import partial
+from urllib.parse import quote
+
+try:
+    import connectorx as cx
+except ImportError:  # optional, results are then read through the DB-API drivers
+    cx = None
 
 # Configure Gemini API Key
 genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
 
+# ConnectorX opens a fresh connection per read and so bypasses the connection
+# pools; it only pays off for large exports, so it has to be enabled explicitly
+USE_CONNECTORX = cx is not None and bool(st.secrets.get("USE_CONNECTORX", False))
+
+# Static rules go first as the system instruction so every request shares the
+# same prefix; only the database type and question change per call
+SQL_INSTRUCTION = """
+Convert the user query into a **valid** SQL query for the given database type.
+❌ Do NOT include database names (like `DemoDB.table_name`).
+✅ Just return SQL for a **single** database at a time.
+❌ Do NOT use cross-database references.
+"""
+MONGO_INSTRUCTION = """
+Convert the user query into a MongoDB aggregation pipeline for a single collection.
+✅ Return ONLY a JSON array of pipeline stages, like `[{"$match": {...}}, {"$group": {...}}]`.
+❌ Do NOT include the collection name, `db.collection.aggregate(...)` or any JavaScript.
+❌ Do NOT use the documents' `_id` field; it is removed before the pipeline runs.
+❌ Do NOT use `$out` or `$merge`; the pipeline must only read data.
+"""
+
+# Streamlit re-executes this file on every interaction, so keep one model per
+# instruction for the server process instead of rebuilding it each run
+@st.cache_resource(show_spinner=False)
+def get_model(system_instruction):
+    return genai.GenerativeModel(model_name="gemini-2.0-flash", system_instruction=system_instruction)
+
 st.title("Multi-Database AI Query Tool")
 
 # Step 1: Select Database Type
@@ -41,103 +79,561 @@ if db_type == "MongoDB":
     collection_name = st.text_input("Collection Name (required for MongoDB queries)")
 
 # Helper Classes & Functions
-class JSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        return super().default(obj)
+# Frozen so it hashes directly as a cache key; the password is kept out of repr
+@dataclass(frozen=True, slots=True)
+class DBConfig:
+    host: str
+    port: int | None
+    database: str
+    user: str
+    password: str = field(repr=False, compare=True)
+
+    def without_password(self):
+        return replace(self, password="")
+
+    # This class is redefined on every rerun and instances from different runs
+    # never compare equal, so shared cache keys use a plain tuple instead
+    def cache_key(self):
+        return astuple(self.without_password())
+
+    # Remove port if None (some drivers don't want it)
+    def as_kwargs(self):
+        kwargs = asdict(self)
+        if kwargs["port"] is None:
+            kwargs.pop("port")
+        return kwargs
+
+DRIVER_MODULES = {
+    "PostgreSQL": "psycopg2",
+    "MySQL": "mysql.connector",
+    "MSSQL": "pymssql",
+    "MongoDB": "pymongo",
+}
+
+# Drivers are imported on first use so a session only loads the one it talks
+# to; after that the import is a sys.modules lookup
+def _get_driver(db_type):
+    return importlib.import_module(DRIVER_MODULES[db_type])
+
+# Markdown code fences Gemini wraps around its answer
+_FENCE_RE = re.compile(r"^```(?:sql|json)?\n?|\n?```$", re.MULTILINE)
 
-def generate_sql(nl_query, db_type):
+def _request_sql(nl_query, db_type, on_chunk=None):
+    if db_type == "MongoDB":
+        instruction, prompt = MONGO_INSTRUCTION, f"User Query: {nl_query}\nPipeline:"
+    else:
+        instruction, prompt = SQL_INSTRUCTION, f"Database: {db_type}\nUser Query: {nl_query}\nSQL:"
+    # Stream so the query can be shown while Gemini is still generating it
+    chunks = []
+    for chunk in get_model(instruction).generate_content(prompt, stream=True):
+        chunks.append(chunk.text)
+        if on_chunk is not None:
+            on_chunk("".join(chunks))
+    return _FENCE_RE.sub("", "".join(chunks)).strip()
+
+# Small thread-safe store with per-entry expiry, shared by all sessions when
+# held in st.cache_resource. The least recently used entry is dropped once it
+# is full.
+class TTLCache:
+    def __init__(self, ttl, max_entries):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at), least recently used first
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._entries.get(key, (None, None))
+            if expires_at is None:
+                return None
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self._max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = (value, time.monotonic() + self._ttl)
+
+# The prompt only depends on the question and the database type, so repeated
+# questions can reuse the earlier answer
+@st.cache_resource(show_spinner=False)
+def get_sql_cache():
+    return TTLCache(ttl=3600, max_entries=1024)
+
+def generate_sql(nl_query, db_type, regenerate=False, on_chunk=None):
     try:
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-
-        prompt = f"""
-        Convert this user query into a **valid** SQL query for **{db_type}**.
-        ❌ Do NOT include database names (like `DemoDB.table_name`).
-        ✅ Just return SQL for a **single** database at a time.
-        ❌ Do NOT use cross-database references.
-
-        User Query: {nl_query}
-        SQL:
-        """
-        response = model.generate_content(prompt)
-        sql_query = response.text.strip().replace("```sql", "").replace("```", "").strip()
+        cache = get_sql_cache()
+        key = (nl_query, db_type)
+        if not regenerate:
+            sql_query = cache.get(key)
+            if sql_query is not None:
+                return sql_query
+        sql_query = _request_sql(nl_query, db_type, on_chunk)
+        # Regenerating replaces the old answer so unticking "Regenerate" keeps the new one
+        cache.set(key, sql_query)
         return sql_query
     except Exception as e:
         return f"Error generating SQL: {str(e)}"
 
-def execute_mongo_query(collection_name, db_config):
+# Long fetches and DataFrame builds run on this session's own worker, so a
+# rerun can interrupt the wait while the script thread keeps the page updated.
+# Jobs are keyed: a rerun that asks for the same job again waits on the one
+# already running, and a job nobody waits for any more is cancelled if it
+# hasn't started yet. The worker must not call st.* (it has no script context).
+def run_in_background(key, fn, *args, **kwargs):
+    executor = st.session_state.get("_executor")
+    if executor is None:
+        executor = st.session_state["_executor"] = ThreadPoolExecutor(max_workers=1)
+    pending = st.session_state.setdefault("_pending_jobs", {})
+    for other_key, other in list(pending.items()):
+        if other.done() or (other_key != key and other.cancel()):
+            pending.pop(other_key)
+    future = pending.get(key)
+    if future is None:
+        future = pending[key] = executor.submit(fn, *args, **kwargs)
+    done = threading.Event()
+    future.add_done_callback(lambda _: done.set())
+    status = st.empty()
+    started = time.monotonic()
+    while not done.wait(0.2):
+        status.caption(f"Loading results... {time.monotonic() - started:.1f}s")
+    status.empty()
+    pending.pop(key, None)
+    return future.result()
+
+POOL_SIZE = 8
+
+# Concurrent pings make the client open several sockets up front
+def warm_mongo_client(client, database, size=POOL_SIZE):
+    with ThreadPoolExecutor(max_workers=size) as executor:
+        list(executor.map(lambda _: client[database].command("ping"), range(size)))
+
+# MongoClient is itself a connection pool; build it once per host instead of
+# repeating topology discovery on every query
+@st.cache_resource(show_spinner=False)
+def get_mongo_client(host, port):
+    return _get_driver("MongoDB").MongoClient(host, port, maxPoolSize=20)
+
+MONGO_BATCH_SIZE = 1000
+
+# Stages that write to the database; the tool only reads
+MONGO_WRITE_STAGES = {"$out", "$merge"}
+# Stages the server only accepts as the first stage of a pipeline
+MONGO_FIRST_STAGES = {
+    "$geoNear", "$search", "$searchMeta", "$vectorSearch", "$collStats",
+    "$indexStats", "$documents", "$changeStream", "$currentOp",
+    "$listSessions", "$listLocalSessions", "$planCacheStats", "$listSearchIndexes",
+}
+
+# _id is dropped right after any leading first-stage-only operator, before the
+# user's other stages, so ObjectIds never reach the DataFrame
+def _build_pipeline(pipeline, limit):
+    for stage in pipeline:
+        if not isinstance(stage, dict) or len(stage) != 1:
+            raise ValueError("Each pipeline stage must be an object with a single operator.")
+        if next(iter(stage)) in MONGO_WRITE_STAGES:
+            raise ValueError("Pipelines that write data ($out, $merge) are not allowed.")
+    split = 1 if pipeline and next(iter(pipeline[0])) in MONGO_FIRST_STAGES else 0
+    stages = pipeline[:split] + [{"$project": {"_id": 0}}] + pipeline[split:]
+    if limit:
+        stages.append({"$limit": limit})
+    return stages
+
+# The query is only sent once the worker opens the cursor
+def _read_documents(open_cursor):
+    return pd.DataFrame.from_records(open_cursor())
+
+def execute_mongo_query(collection_name, db_config, projection=None, limit=0, pipeline=None):
     try:
-        client = pymongo.MongoClient(db_config["host"], int(db_config["port"]))
-        db = client[db_config["database"]]
+        client = get_mongo_client(db_config.host, db_config.port)
+        db = client[db_config.database]
         collection = db[collection_name]
-        data = list(collection.find({}, {"_id": 0}))  # Exclude _id
-        return {"data": data}
+        if pipeline is not None:
+            # Filtering and grouping run on the server
+            stages = _build_pipeline(pipeline, limit)
+            open_cursor = partial(collection.aggregate, stages, allowDiskUse=True, batchSize=MONGO_BATCH_SIZE)
+            key = ("mongo", db_config.cache_key(), collection_name, json.dumps(stages, default=str), limit)
+            return {"df": run_in_background(key, _read_documents, open_cursor)}
+        if projection is None:
+            projection = {"_id": 0}  # Exclude _id
+        # limit=0 means no limit, matching pymongo
+        open_cursor = lambda: collection.find({}, projection).batch_size(MONGO_BATCH_SIZE).limit(limit)
+        key = ("mongo", db_config.cache_key(), collection_name, json.dumps(projection), limit)
+        return {"df": run_in_background(key, _read_documents, open_cursor)}
     except Exception as e:
         return {"error": str(e)}
 
-def execute_sql_query(sql_query, db_type, db_config):
+def _connect(db_type, db_config):
+    if db_type in ("PostgreSQL", "MySQL"):
+        return _get_driver(db_type).connect(**db_config.as_kwargs())
+    if db_type == "MSSQL":
+        return _get_driver(db_type).connect(
+            server=db_config.host,
+            user=db_config.user,
+            password=db_config.password,
+            database=db_config.database,
+            port=db_config.port or 1433
+        )
+    raise ValueError("Invalid database type")
+
+POOL_IDLE_TIMEOUT = 300  # seconds before an unused connection is closed
+POOL_PING_AFTER = 30  # seconds idle before a connection is checked on reuse
+POOL_WAIT_TIMEOUT = 30  # seconds to wait for a free connection
+
+def _is_alive(conn):
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+def _close_quietly(conn):
     try:
-        if db_type == "PostgreSQL":
-            conn = psycopg2.connect(**db_config)
-        elif db_type == "MySQL":
-            conn = mysql.connector.connect(**db_config)
-        elif db_type == "MSSQL":
-            conn = pymssql.connect(
-                server=db_config["host"],
-                user=db_config["user"],
-                password=db_config["password"],
-                database=db_config["database"],
-                port=int(db_config.get("port", 1433))
+        conn.close()
+    except Exception:
+        pass
+
+class PoolError(Exception):
+    pass
+
+# Keeps up to maxconn open DB-API connections for reuse across queries
+class ConnectionPool:
+    def __init__(self, connect, maxconn=POOL_SIZE):
+        self._connect = connect
+        self._maxconn = maxconn
+        self._lock = threading.Lock()
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._in_use = 0
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._state = {}
+
+    # Per-connection scratch space (e.g. prepared statements), dropped together
+    # with the connection
+    def state(self, conn):
+        return self._state.setdefault(id(conn), {})
+
+    def _discard(self, conn):
+        self._state.pop(id(conn), None)
+        _close_quietly(conn)
+
+    def _reap(self):
+        cutoff = time.monotonic() - POOL_IDLE_TIMEOUT
+        with self._lock:
+            expired = [conn for conn, returned_at in self._idle if returned_at < cutoff]
+            self._idle = [(conn, returned_at) for conn, returned_at in self._idle if returned_at >= cutoff]
+        for conn in expired:
+            self._discard(conn)
+
+    # Connections that could still be opened without exceeding maxconn
+    def spare(self):
+        with self._lock:
+            return self._maxconn - self._in_use - len(self._idle)
+
+    # Opens a connection straight into the idle list without taking a slot, so
+    # warming never waits on queries; it is closed again if the pool filled up
+    def add_idle(self):
+        conn = self._connect()
+        with self._lock:
+            if self._in_use + len(self._idle) < self._maxconn:
+                self._idle.append((conn, time.monotonic()))
+                return
+        _close_quietly(conn)
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=POOL_WAIT_TIMEOUT):
+            raise PoolError(
+                f"All {self._maxconn} connections are busy; no connection was freed "
+                f"within {POOL_WAIT_TIMEOUT}s. Please try again later."
             )
+        with self._lock:
+            self._in_use += 1
+        try:
+            self._reap()
+            while True:
+                with self._lock:
+                    conn, returned_at = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    return self._connect()
+                # Servers and proxies drop idle sessions (wait_timeout etc.), so
+                # anything that sat for a while is checked before it is handed out
+                if time.monotonic() - returned_at < POOL_PING_AFTER or _is_alive(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            # Drop whatever the query left open; a connection that can't be
+            # rolled back is broken and gets discarded instead of reused
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
         else:
-            return {"error": "Invalid database type"}
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+        self._reap()
 
+# Pools live across Streamlit reruns, so repeated "Get Answer" clicks reuse
+# already authenticated connections. The cache is bounded: an evicted pool's
+# connections are closed when the drivers' connection objects are collected.
+@st.cache_resource(show_spinner=False, ttl=1800, max_entries=8, hash_funcs={DBConfig: hash})
+def get_pool(db_type, db_config):
+    return ConnectionPool(lambda: _connect(db_type, db_config))
+
+# Opens one connection first so bad credentials fail with a single login
+# attempt, then fills the rest of the free capacity concurrently so the
+# handshakes overlap; the first error is raised. No slots are held, so Connect
+# neither waits on running queries nor blocks another session's warm-up.
+def warm_pool(pool, size=POOL_SIZE):
+    if min(size, pool.spare()) <= 0:
+        return
+    pool.add_idle()
+    remaining = min(size - 1, pool.spare())
+    if remaining <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=remaining) as executor:
+        futures = [executor.submit(pool.add_idle) for _ in range(remaining)]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        raise errors[0]
+
+@contextmanager
+def pooled_connection(pool):
+    conn = pool.getconn()
+    try:
+        yield conn, pool.state(conn)
+    finally:
+        pool.putconn(conn)
+
+FETCH_SIZE = 2000
+
+# DECLARE ... CURSOR FOR only accepts queries, not EXPLAIN, SHOW and the like
+_DECLARABLE_RE = re.compile(r"^\s*(select|with|values)\b", re.IGNORECASE)
+
+def _open_cursor(conn, db_type, sql_query):
+    if db_type == "PostgreSQL" and _DECLARABLE_RE.match(sql_query):
+        # Named cursors are server-side, so rows arrive FETCH_SIZE at a time
+        cursor = conn.cursor(name="stream_cur")
+    elif db_type == "MySQL":
+        cursor = conn.cursor(buffered=False)
+    else:
         cursor = conn.cursor()
-        cursor.execute(sql_query)
-        result = cursor.fetchall()
-        column_names = [desc[0] for desc in cursor.description]
+    cursor.arraysize = FETCH_SIZE
+    return cursor
 
-        cursor.close()
-        conn.close()
+# cursor.description type codes mapped to nullable pandas dtypes, so integer,
+# float and text columns don't fall back to object. pymssql only reports broad
+# classes (NUMBER covers ints and floats), so only its strings are mapped.
+# MySQL strings are left to inference: VARCHAR/CHAR/TEXT share their type
+# codes with VARBINARY/BINARY/BLOB, which come back as bytes.
+COLUMN_DTYPES = {
+    "PostgreSQL": {
+        16: "boolean",
+        20: "Int64", 21: "Int64", 23: "Int64",
+        700: "Float64", 701: "Float64",
+        25: "string[pyarrow]", 1042: "string[pyarrow]", 1043: "string[pyarrow]",
+    },
+    "MySQL": {
+        1: "Int64", 2: "Int64", 3: "Int64", 8: "Int64", 9: "Int64", 13: "Int64",
+        4: "Float64", 5: "Float64",
+    },
+    "MSSQL": {1: "string[pyarrow]"},
+}
 
-        return {"columns": column_names, "data": [list(row) for row in result]}
+# Builds each column straight from the row values. Going through
+# DataFrame.from_records first would turn an integer column with NULLs into
+# float64 and round anything beyond 2**53 before the Int64 cast.
+def _batch_frame(rows, column_names, dtypes):
+    columns = list(zip(*rows)) if rows else [()] * len(column_names)
+    data = {}
+    for i, values in enumerate(columns):
+        if dtypes[i] is not None:
+            try:
+                data[i] = pd.array(list(values), dtype=dtypes[i])
+                continue
+            except (TypeError, ValueError, OverflowError):
+                # e.g. an unsigned BIGINT beyond int64; the column is kept as
+                # exact Python objects from here on
+                dtypes[i] = object
+        data[i] = pd.Series(list(values), dtype=dtypes[i])
+    frame = pd.DataFrame(data)
+    frame.columns = column_names
+    return frame
+
+def _read_frame(cursor, db_type):
+    frames = []
+    column_names = None
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if column_names is None:
+            # Named PostgreSQL cursors only describe their columns after a fetch
+            column_names = [desc[0] for desc in cursor.description]
+            type_map = COLUMN_DTYPES.get(db_type, {})
+            dtypes = [type_map.get(desc[1]) for desc in cursor.description]
+        if not rows:
+            break
+        # Converting each batch keeps the row tuples short-lived
+        frames.append(_batch_frame(rows, column_names, dtypes))
+    if not frames:
+        return _batch_frame([], column_names, dtypes)
+    if len(frames) == 1:
+        # Most answers fit in one batch; concat would only copy it again
+        return frames[0]
+    # A column that fell back to object part-way through is made object in the
+    # earlier batches too, so the concat doesn't coerce it to Float64
+    for i, dtype in enumerate(dtypes):
+        if dtype is object:
+            for frame in frames:
+                if frame.dtypes.iloc[i] != object:
+                    frame.isetitem(i, frame.iloc[:, i].astype(object))
+    return pd.concat(frames, ignore_index=True)
+
+CONNECTORX_SCHEMES = {"PostgreSQL": "postgresql", "MySQL": "mysql", "MSSQL": "mssql"}
+
+def _connectorx_uri(db_type, db_config):
+    netloc = db_config.host
+    if db_config.port:
+        netloc += f":{db_config.port}"
+    return (
+        f"{CONNECTORX_SCHEMES[db_type]}://{quote(db_config.user, safe='')}:"
+        f"{quote(db_config.password, safe='')}@{netloc}/{quote(db_config.database, safe='')}"
+    )
+
+MAX_PREPARED_PER_CONNECTION = 64
+_PREPARABLE_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_CONNECTORX_UNSUPPORTED_RE = re.compile(r"sql ?parser|not (yet )?supported|unsupported", re.IGNORECASE)
+
+# Paraphrased questions often produce the exact same SQL; preparing it once per
+# connection lets MySQL skip parsing and planning on later runs. PostgreSQL
+# keeps its server-side cursor instead, since DECLARE can't wrap an EXECUTE.
+def _execute_prepared(cursor, conn_state, sql_query):
+    prepared = conn_state.setdefault("prepared", {})
+    name = prepared.get(sql_query)
+    if name is None:
+        if len(prepared) >= MAX_PREPARED_PER_CONNECTION:
+            cursor.execute(f"DEALLOCATE PREPARE {prepared.pop(next(iter(prepared)))}")
+        name = f"q_{hashlib.md5(sql_query.encode()).hexdigest()}"
+        cursor.execute(f"PREPARE {name} FROM %s", (sql_query,))
+        prepared[sql_query] = name
+    cursor.execute(f"EXECUTE {name}")
+
+# Runs on the background worker, so the pool is looked up by the caller
+def _run_sql_query(pool, sql_query, db_type, db_config):
+    # ConnectorX and PostgreSQL's DECLARE ... CURSOR FOR both take a single
+    # statement without the trailing semicolon
+    sql_query = sql_query.strip().rstrip(";")
+
+    if USE_CONNECTORX and _PREPARABLE_RE.match(sql_query):
+        try:
+            # Reads straight into Arrow columns, skipping per-row Python objects
+            table = cx.read_sql(_connectorx_uri(db_type, db_config), sql_query, return_type="arrow")
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        except RuntimeError as e:
+            # Only SQL that ConnectorX can't parse goes through the driver;
+            # a query that failed on the server would just fail again
+            if not _CONNECTORX_UNSUPPORTED_RE.search(str(e)):
+                raise
+
+    with pooled_connection(pool) as (conn, conn_state):
+        cursor = _open_cursor(conn, db_type, sql_query)
+        try:
+            if db_type == "MySQL" and _PREPARABLE_RE.match(sql_query):
+                _execute_prepared(cursor, conn_state, sql_query)
+            else:
+                cursor.execute(sql_query)
+            return _read_frame(cursor, db_type)
+        finally:
+            cursor.close()
+
+MAX_CACHED_RESULT_BYTES = 50 * 1024 * 1024
+
+# Connect has already checked the password, so it is left out of the key
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    return TTLCache(ttl=60, max_entries=128)
+
+def execute_sql_query(sql_query, db_type, db_config):
+    try:
+        if db_type not in ("PostgreSQL", "MySQL", "MSSQL"):
+            return {"error": "Invalid database type"}
+
+        key = ("sql", db_config.cache_key(), db_type, sql_query)
+        df = get_result_cache().get(key)
+        if df is not None:
+            return {"df": df}
+
+        pool = get_pool(db_type, db_config)
+        df = run_in_background(key, _run_sql_query, pool, sql_query, db_type, db_config)
+        # Oversized frames are kept out of the cache
+        if df.memory_usage(deep=True).sum() <= MAX_CACHED_RESULT_BYTES:
+            get_result_cache().set(key, df)
+        return {"df": df}
     except Exception as e:
         return {"error": str(e)}
 
+# Redraws the generated query in place; used as the streaming callback
+def show_generated_query(box, title, text, language):
+    with box.container():
+        st.subheader(title)
+        st.code(text, language=language)
+
+PAGE_SIZE = 1000
+
+# Only one page is sent to the browser; the full frame stays on the server.
+# The page widget is keyed per result so a new answer starts on page 1.
+def show_paged_dataframe(df, result_id):
+    pages = max(1, math.ceil(len(df) / PAGE_SIZE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"page_{result_id}"
+        )
+    start = (page - 1) * PAGE_SIZE
+    st.dataframe(df.iloc[start:start + PAGE_SIZE])
+    if pages > 1:
+        st.caption(f"Rows {start + 1}-{min(start + PAGE_SIZE, len(df))} of {len(df)}")
+
+def store_result(df, query):
+    st.session_state["last_query"] = query
+    st.session_state["last_df"] = df
+    st.session_state["result_id"] = st.session_state.get("result_id", 0) + 1
+
 # Step 3: Connect to Database
 if st.button("Connect"):
     # Use defaults for port if empty
     use_port = port if port else default_ports.get(db_type)
-    db_config = {
-        "host": host,
-        "port": int(use_port) if use_port else None,
-        "database": database,
-        "user": user,
-        "password": password,
-    }
-
-    # Remove port from dict if None (some drivers don't want it)
-    if db_config["port"] is None:
-        db_config.pop("port")
+    db_config = DBConfig(
+        host=host,
+        port=int(use_port) if use_port else None,
+        database=database,
+        user=user,
+        password=password,
+    )
 
     try:
-        if db_type == "PostgreSQL":
-            psycopg2.connect(**db_config).close()
-        elif db_type == "MySQL":
-            mysql.connector.connect(**db_config).close()
-        elif db_type == "MSSQL":
-            conn = pymssql.connect(
-                server=db_config["host"],
-                user=db_config["user"],
-                password=db_config["password"],
-                database=db_config["database"],
-                port=int(db_config.get("port", 1433))
-            )
-            conn.close()
+        if db_type in ("PostgreSQL", "MySQL", "MSSQL"):
+            warm_pool(get_pool(db_type, db_config))
         elif db_type == "MongoDB":
-            client = pymongo.MongoClient(host, int(use_port))
-            client[database].command("ping")
+            warm_mongo_client(get_mongo_client(db_config.host, db_config.port), db_config.database)
         else:
             st.error("Unsupported database type.")
             st.stop()
@@ -145,6 +641,8 @@ if st.button("Connect"):
         st.success(f"Connected to {db_type} successfully!")
         st.session_state["db_type"] = db_type
         st.session_state["db_config"] = db_config
+        for key in ("last_df", "last_query"):
+            st.session_state.pop(key, None)
         if db_type == "MongoDB":
             st.session_state["collection_name"] = collection_name
 
@@ -152,14 +650,24 @@ if st.button("Connect"):
         st.error(f"Connection failed: {str(e)}")
 
 # Step 4: Query Processing
-if "db_type" in st.session_state:
+# Runs as a fragment so asking questions and paging through results only
+# reruns this panel, not the connection form and setup above
+@st.fragment
+def query_panel():
     st.subheader(f"Ask a question for {st.session_state['db_type']}")
     user_query = st.text_input("Enter your question:")
+    regenerate = st.checkbox("Regenerate query (ignore cached answer)")
+    if st.session_state["db_type"] == "MongoDB":
+        max_docs = st.slider("Max documents to load (0 = all)", 0, 100000, 1000, step=1000)
 
     if st.button("Get Answer"):
+        # Results are kept in session state so paging through them survives reruns
+        for key in ("last_df", "last_query"):
+            st.session_state.pop(key, None)
         try:
             db_type = st.session_state["db_type"]
             db_config = st.session_state["db_config"]
+            query_box = st.empty()
 
             if db_type == "MongoDB":
                 coll_name = st.session_state.get("collection_name")
@@ -167,26 +675,59 @@ if "db_type" in st.session_state:
                     st.error("Please enter a collection name to query MongoDB.")
                     st.stop()
 
-                result = execute_mongo_query(coll_name, db_config)
+                # Without a question the collection is loaded as is
+                pipeline = None
+                generated = None
+                if user_query:
+                    show_pipeline = partial(
+                        show_generated_query, query_box, "Generated Aggregation Pipeline:", language="json"
+                    )
+                    pipeline_text = generate_sql(user_query, db_type, regenerate, on_chunk=show_pipeline)
+                    if pipeline_text.startswith("Error"):
+                        query_box.empty()
+                        st.error(pipeline_text)
+                        st.stop()
+                    show_pipeline(pipeline_text)
+                    try:
+                        pipeline = json.loads(pipeline_text)
+                    except ValueError:
+                        pipeline = None
+                    if not isinstance(pipeline, list):
+                        st.error("Gemini did not return a valid aggregation pipeline.")
+                        st.stop()
+                    generated = ("Generated Aggregation Pipeline:", pipeline_text, "json")
+
+                result = execute_mongo_query(coll_name, db_config, limit=max_docs, pipeline=pipeline)
                 if "error" in result:
                     st.error(result["error"])
                 else:
-                    df = pd.DataFrame(result["data"])
-                    st.dataframe(df)
+                    store_result(result["df"], generated)
             else:
-                sql_query = generate_sql(user_query, db_type)
+                show_sql = partial(show_generated_query, query_box, "Generated SQL Query:", language="sql")
+                sql_query = generate_sql(user_query, db_type, regenerate, on_chunk=show_sql)
                 if sql_query.startswith("Error"):
+                    query_box.empty()
                     st.error(sql_query)
                 else:
-                    st.subheader("Generated SQL Query:")
-                    st.code(sql_query, language="sql")
+                    show_sql(sql_query)
                     result = execute_sql_query(sql_query, db_type, db_config)
                     if "error" in result:
                         st.error(result["error"])
                     else:
-                        df = pd.DataFrame(result["data"], columns=result["columns"])
-                        st.dataframe(df)
+                        store_result(result["df"], ("Generated SQL Query:", sql_query, "sql"))
+
+            if "last_df" in st.session_state:
+                # Redrawn below together with the results
+                query_box.empty()
 
         except Exception as e:
             st.error(f"Unexpected error: {str(e)}")
             st.text(traceback.format_exc())
+
+    if "last_df" in st.session_state:
+        if st.session_state.get("last_query"):
+            show_generated_query(st.empty(), *st.session_state["last_query"])
+        show_paged_dataframe(st.session_state["last_df"], st.session_state["result_id"])
+
+if "db_type" in st.session_state:
+    query_panel()